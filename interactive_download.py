@@ -6,23 +6,38 @@ Complete workflow: Login → Select Course → Select Units → Select Resources
 
 import os
 import sys
+import io
 import json
+import html
+import codecs
 import getpass
 import shutil
+import functools
+import atexit
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from typing import Callable, List, Dict, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import re
+import fnmatch
 import curses
 from colorama import Fore, Style, init as colorama_init
-from pypdf import PdfWriter
+from pypdf import PdfReader, PdfWriter
 from pdf_dedup import deduplicate_pdfs_in_folder
 import subprocess
+import socket
 import tempfile
 import time
 import zipfile
 import logging
+import threading
+import signal
+import queue
 
 # Try importing conversion libraries
 try:
@@ -43,9 +58,32 @@ try:
 except ImportError:
     ASPOSE_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import lxml.etree
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
 # Initialize colorama
 colorama_init(autoreset=True)
 
+# Redirected output gets no colour codes at all, so nothing is built or stripped per line
+if not sys.stdout.isatty():
+    Fore.BLUE = Fore.CYAN = Fore.GREEN = Fore.RED = Fore.YELLOW = ""
+    Style.BRIGHT = Style.RESET_ALL = ""
+
+# Status marks reused by the per-file loops
+_OK_MARK   = f"{Fore.GREEN}✓{Style.RESET_ALL}"
+_DEL_MARK  = f"{Fore.YELLOW}✓{Style.RESET_ALL}"
+_FAIL_MARK = f"{Fore.RED}✗{Style.RESET_ALL}"
+
 # Cache file for course data
 CACHE_FILE = Path("courses.json")
 
@@ -60,6 +98,192 @@ RESOURCE_TYPES = {
     "8": "References",
 }
 
+# Course code prefix -> sort priority (newest academic year first)
+YEAR_PRIORITY = {"UE25": 0, "UE24": 1, "UE23": 2, "UE22": 3, "UE21": 4, "UE20": 5}
+
+# Number of concurrent file downloads per unit
+DOWNLOAD_WORKERS = 8
+
+# Office formats offered for PDF conversion
+OFFICE_EXTENSIONS = (".docx", ".pptx", ".doc", ".ppt")
+
+# Patterns for pulling download targets / filenames out of server responses
+# onclick attribute values only (as the DOM scan did), so script blocks can't add links;
+# HTML comments are stripped first, since the DOM never saw attributes inside them
+_RE_ONCLICK = re.compile(rb"""\sonclick\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+_RE_HTML_COMMENT = re.compile(rb"<!--.*?-->", re.DOTALL)
+_RE_LOAD_IFRAME = re.compile(r"loadIframe\('([^']+)'")
+_RE_DOWNLOAD_DOC = re.compile(r"downloadcoursedoc\('([^']+)'")
+_RE_FILENAME = re.compile(r'filename[*]?=["\']?(?:UTF-8\'\')?([^"\';\n]+)')
+_RE_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+# Digit runs, for natural filename sorting
+_RE_DIGITS = re.compile(r'(\d+)')
+
+# Characters stripped from option values (ids arrive wrapped in escaped quotes)
+_ID_JUNK = str.maketrans("", "", "\\\"'")
+
+# Content-Type substring -> file extension (first match wins, default .pdf)
+CONTENT_TYPE_EXTENSIONS = [
+    ("application/vnd.openxmlformats-officedocument.presentationml", ".pptx"),
+    ("application/vnd.openxmlformats-officedocument.wordprocessingml", ".docx"),
+    ("application/vnd.openxmlformats-officedocument.spreadsheetml", ".xlsx"),
+    ("application/vnd.ms-powerpoint", ".ppt"),
+    ("application/msword", ".doc"),
+    ("application/pdf", ".pdf"),
+]
+
+class _SafeNameTable(dict):
+    """str.translate table keeping alphanumerics and " -_"; entries are cached on first use"""
+    def __missing__(self, code: int) -> str:
+        c = chr(code)
+        value = c if c.isalnum() or c in " -_" else "_"
+        self[code] = value
+        return value
+
+
+# Filename sanitising table (filled lazily by _SafeNameTable.__missing__)
+_SAFE_NAME_TABLE = _SafeNameTable()
+
+# Extensions we trust when the server names the file in Content-Disposition
+KNOWN_EXTENSIONS = {".pdf", ".pptx", ".ppt", ".docx", ".doc", ".xlsx"}
+
+# Buffer size used when streaming response bodies to disk
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Write buffer for merged PDFs (batches pypdf's many small writes)
+PDF_WRITE_BUFFER = 1024 * 1024
+
+# Merges whose inputs total less than this are serialised in memory and written at once;
+# larger ones go through pdftk / qpdf when available
+PDF_IN_MEMORY_LIMIT = 64 * 1024 * 1024
+
+# Files removed by cleanup_unwanted_files
+UNWANTED_PATTERNS = [
+    "README*",
+    "*.md",
+    "*.txt",
+    "Thumbs.db",
+    ".DS_Store",
+    "desktop.ini",
+    "*.tmp",
+    "*.temp",
+    "*~",  # Backup files
+]
+
+# All patterns compiled into one regex, tested once per file;
+# names and patterns are normcase'd (case-insensitive on Windows, like rglob)
+_RE_UNWANTED = re.compile(
+    "|".join(fnmatch.translate(os.path.normcase(p)) for p in UNWANTED_PATTERNS)
+)
+
+# Failed conversions listed by name in the summary (the rest are only counted)
+FAILED_FILES_SHOWN = 10
+
+# Number of concurrent metadata requests (classes / resource links)
+METADATA_WORKERS = 8
+
+# Connection pool sizing for the shared requests.Session (must be >= DOWNLOAD_WORKERS)
+HTTP_POOL_MAXSIZE = 32
+
+
+def ext_from_content_type(content_type: str, default: Optional[str] = ".pdf") -> Optional[str]:
+    """Map a Content-Type header to a file extension"""
+    return next((ext for mime, ext in CONTENT_TYPE_EXTENSIONS if mime in content_type), default)
+
+
+def safe_name(name: str, max_len: int = 60) -> str:
+    """Make a name safe for use as a file/folder name (spaces become underscores)"""
+    return "_".join(name.translate(_SAFE_NAME_TABLE).strip()[:max_len].split())
+
+
+def clean_id(value) -> str:
+    """Strip backslashes and quotes from an option value"""
+    return str(value).translate(_ID_JUNK).strip()
+
+
+def declared_charset(response) -> Optional[str]:
+    """
+    Charset named in the Content-Type header, if any. requests falls back to
+    ISO-8859-1 for undeclared text/* bodies, which would mangle UTF-8 pages.
+    """
+    match = _RE_CHARSET.search(response.headers.get("Content-Type", ""))
+    if not match:
+        return None
+    try:
+        return codecs.lookup(match.group(1)).name
+    except LookupError:
+        return None
+
+
+def _lxml_root(markup, encoding: Optional[str] = None):
+    """
+    Parse HTML with lxml, returning the root element (None for an empty document).
+    Raw bytes are decoded with the given charset (the response's declared one), else
+    UTF-8, since lxml would otherwise assume Latin-1.
+    """
+    if not markup or not markup.strip():
+        return None
+    if isinstance(markup, str):
+        # lxml rejects str input that carries an encoding declaration
+        markup, encoding = markup.encode("utf-8"), "utf-8"
+    # Parsers are not shared between threads, so build one per call
+    try:
+        parser = lxml.html.HTMLParser(encoding=encoding or "utf-8")
+    except LookupError:
+        parser = lxml.html.HTMLParser(encoding="utf-8")
+    try:
+        return lxml.html.fromstring(markup, parser=parser)
+    except (lxml.etree.LxmlError, ValueError):
+        return None
+
+
+def parse_options(markup, encoding: Optional[str] = None) -> List[Tuple[Optional[str], str]]:
+    """Extract (value, text) pairs from <option> tags (lxml when available)"""
+    if LXML_AVAILABLE:
+        root = _lxml_root(markup, encoding)
+        if root is None:
+            return []
+        return [(opt.get("value"), opt.text_content().strip()) for opt in root.iter("option")]
+
+    if isinstance(markup, bytes):
+        soup = BeautifulSoup(markup, "html.parser", from_encoding=encoding)
+    else:
+        soup = BeautifulSoup(markup, "html.parser")
+    return [(opt.get("value"), opt.text.strip()) for opt in soup.find_all("option")]
+
+
+@dataclass
+class DownloadJob:
+    """A single file queued for download"""
+    link: Dict
+    resource_dir: Path
+    index: int       # position in its resource folder, in class order
+    class_name: str  # already passed through safe_name
+
+    @property
+    def stem(self) -> str:
+        """"<counter>.<class name>", extension decided at download time"""
+        return f"{self.index}.{self.class_name}"
+
+    @property
+    def label(self) -> str:
+        """Class name and source URL, for reporting jobs that never get a file name"""
+        if self.link["type"] == "direct":
+            return f"{self.class_name} ({self.link['response'].url})"
+        return f"{self.class_name} ({self.link['url']})"
+
+
+@dataclass
+class FileTree:
+    """One pass over a download folder, grouped for the post-download steps"""
+    base_dir: Path
+    # unit folder -> resource folder -> (PDFs in natural order, their total size)
+    units: Dict[str, Dict[str, Tuple[List[Path], int]]] = field(default_factory=dict)
+    office_files: List[Path] = field(default_factory=list)
+    unwanted: List[Path] = field(default_factory=list)
+    dirs: List[Path] = field(default_factory=list)  # deepest first, base_dir excluded
+
 
 class Timer:
     """Simple timer for performance tracking"""
@@ -89,6 +313,40 @@ class Spinner:
         print("")
 
 
+def _unsafe_member_name(name: str) -> bool:
+    """True for ZIP member names that extractall would have rewritten (absolute or ..)"""
+    parts = name.replace("\\", "/").split("/")
+    return name.startswith(("/", "\\")) or ":" in parts[0] or ".." in parts
+
+
+def rezip_archive(input_path: Path, output_path: Path, transform=None) -> bool:
+    """
+    Copy every file member of a ZIP archive into a fresh deflated archive,
+    streaming entry-by-entry (no extraction to disk). As extracting would, the
+    last of several same-named entries wins and unsafe (absolute/..) names are dropped.
+    If given, transform(name, data) -> bytes rewrites a member's content.
+    Returns False if the input is not a readable ZIP file.
+    """
+    try:
+        with zipfile.ZipFile(input_path, 'r') as zip_in, \
+                zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_out:
+            # Duplicate entries are a common reason Office rejects a file
+            for info in {i.filename: i for i in zip_in.infolist()}.values():
+                if info.is_dir() or _unsafe_member_name(info.filename):
+                    continue
+                # Fresh header so corrupt metadata from the source isn't carried over
+                out_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                out_info.compress_type = zipfile.ZIP_DEFLATED
+                if transform:
+                    zip_out.writestr(out_info, transform(info.filename, zip_in.read(info)))
+                else:
+                    with zip_in.open(info) as src, zip_out.open(out_info, 'w') as dst:
+                        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        return True
+    except zipfile.BadZipFile:
+        return False
+
+
 class DOCXRepair:
     """Handles various DOCX repair strategies"""
     
@@ -106,77 +364,46 @@ class DOCXRepair:
             return False
     
     def repair_by_rezip(self, input_path: Path, output_path: Path) -> bool:
-        """Repair by extracting and re-zipping"""
+        """Repair by re-zipping every member into a fresh archive"""
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                try:
-                    with zipfile.ZipFile(input_path, 'r') as zip_ref:
-                        zip_ref.extractall(temp_path)
-                except zipfile.BadZipFile:
-                    return False
-                
-                with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_out:
-                    for root, dirs, files in os.walk(temp_path):
-                        for file in files:
-                            file_path = Path(root) / file
-                            arcname = file_path.relative_to(temp_path)
-                            zip_out.write(file_path, arcname)
-                return True
+            return rezip_archive(input_path, output_path)
         except Exception:
             return False
     
     def repair_xml_relationships(self, input_path: Path, output_path: Path) -> bool:
         """Repair broken document XML relationships"""
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                try:
-                    with zipfile.ZipFile(input_path, 'r') as zip_ref:
-                        zip_ref.extractall(temp_path)
-                except zipfile.BadZipFile:
-                    return False
-                
+        def fix_parts(name: str, data: bytes) -> bytes:
+            try:
                 # Fix relationships in word/_rels
-                rels_dir = temp_path / "word" / "_rels"
-                if rels_dir.exists():
-                    for rels_file in rels_dir.glob("*.rels"):
-                        try:
-                            content = rels_file.read_text(encoding='utf-8')
-                            # Remove empty hyperlinks
-                            content = content.replace('Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink" TargetMode="External" Target=""', '')
-                            # Remove other problematic patterns
-                            content = re.sub(r'<Relationship[^>]*Target=""[^>]*/>', '', content)
-                            rels_file.write_text(content, encoding='utf-8')
-                        except Exception:
-                            pass
-                
+                if name.startswith("word/_rels/") and name.endswith(".rels"):
+                    content = data.decode("utf-8")
+                    # Remove empty hyperlinks
+                    content = content.replace('Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink" TargetMode="External" Target=""', '')
+                    # Remove other problematic patterns
+                    content = re.sub(r'<Relationship[^>]*Target=""[^>]*/>', '', content)
+                    return content.encode("utf-8")
                 # Fix document.xml if needed
-                doc_xml = temp_path / "word" / "document.xml"
-                if doc_xml.exists():
-                    try:
-                        content = doc_xml.read_text(encoding='utf-8')
-                        # Remove invalid XML characters
-                        content = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F]', '', content)
-                        doc_xml.write_text(content, encoding='utf-8')
-                    except Exception:
-                        pass
-                
-                with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_out:
-                    for root, dirs, files in os.walk(temp_path):
-                        for file in files:
-                            file_path = Path(root) / file
-                            arcname = file_path.relative_to(temp_path)
-                            zip_out.write(file_path, arcname)
-                
-                # Verify the repair worked
-                try:
-                    import docx
-                    docx.Document(str(output_path))
-                    return True
-                except:
-                    # If python-docx not available, just check if file is valid
-                    return True
+                if name == "word/document.xml":
+                    content = data.decode("utf-8")
+                    # Remove invalid XML characters
+                    content = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F]', '', content)
+                    return content.encode("utf-8")
+            except UnicodeDecodeError:
+                pass
+            return data
+
+        try:
+            if not rezip_archive(input_path, output_path, fix_parts):
+                return False
+            
+            # Verify the repair worked
+            try:
+                import docx
+                docx.Document(str(output_path))
+                return True
+            except:
+                # If python-docx not available, just check if file is valid
+                return True
         except Exception:
             return False
     
@@ -205,122 +432,325 @@ class PPTXRepair:
     def __init__(self):
         pass
     
-    def repair_with_pptx(self, input_path: Path, output_path: Path) -> bool:
-        """Repair by loading and re-saving with python-pptx"""
-        if not PPTX_AVAILABLE:
-            return False
-        try:
-            prs = Presentation(str(input_path))
-            prs.save(str(output_path))
-            return True
-        except Exception:
-            return False
-    
     def repair_by_rezip(self, input_path: Path, output_path: Path) -> bool:
-        """Repair by extracting and re-zipping"""
+        """Repair by re-zipping every member into a fresh archive"""
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                try:
-                    with zipfile.ZipFile(input_path, 'r') as zip_ref:
-                        zip_ref.extractall(temp_path)
-                except zipfile.BadZipFile:
-                    return False
-                
-                with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_out:
-                    for root, dirs, files in os.walk(temp_path):
-                        for file in files:
-                            file_path = Path(root) / file
-                            arcname = file_path.relative_to(temp_path)
-                            zip_out.write(file_path, arcname)
-                return True
+            return rezip_archive(input_path, output_path)
         except Exception:
             return False
     
     def repair_xml_relationships(self, input_path: Path, output_path: Path) -> bool:
         """Repair broken slide XML relationships"""
+        def fix_rels(name: str, data: bytes) -> bytes:
+            if name.startswith("ppt/_rels/") and name.endswith(".rels"):
+                data = data.replace(b'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink" TargetMode="External" Target=""', b'')
+            return data
+
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
+            if not rezip_archive(input_path, output_path, fix_rels):
+                return False
+            
+            if PPTX_AVAILABLE:
                 try:
-                    with zipfile.ZipFile(input_path, 'r') as zip_ref:
-                        zip_ref.extractall(temp_path)
-                except zipfile.BadZipFile:
+                    Presentation(str(output_path))
+                    return True
+                except:
                     return False
-                
-                rels_dir = temp_path / "ppt" / "_rels"
-                if rels_dir.exists():
-                    for rels_file in rels_dir.glob("*.rels"):
-                        try:
-                            content = rels_file.read_text(encoding='utf-8')
-                            content = content.replace('Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink" TargetMode="External" Target=""', '')
-                            rels_file.write_text(content, encoding='utf-8')
-                        except Exception:
-                            pass
-                
-                with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_out:
-                    for root, dirs, files in os.walk(temp_path):
-                        for file in files:
-                            file_path = Path(root) / file
-                            arcname = file_path.relative_to(temp_path)
-                            zip_out.write(file_path, arcname)
-                
-                if PPTX_AVAILABLE:
-                    try:
-                        Presentation(str(output_path))
-                        return True
-                    except:
-                        return False
-                return True
+            return True
         except Exception:
             return False
     
     def repair_by_rezip_linux(self, input_path: Path, output_path: Path) -> bool:
-        """Linux-specific repair: extract and repackage using zipfile (mimics unzip+zip CLI)"""
+        """Linux-specific repair: repackage using zipfile (mimics unzip+zip CLI)"""
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                try:
-                    with zipfile.ZipFile(input_path, 'r') as zip_ref:
-                        zip_ref.extractall(temp_path)
-                except zipfile.BadZipFile:
-                    return False
-
-                with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_out:
-                    for root, dirs, files in os.walk(temp_path):
-                        for file in sorted(files):  # sorted for deterministic order
-                            file_path = Path(root) / file
-                            arcname = file_path.relative_to(temp_path)
-                            zip_out.write(file_path, arcname)
-                return output_path.exists() and output_path.stat().st_size > 0
+            if not rezip_archive(input_path, output_path):
+                return False
+            return output_path.exists() and output_path.stat().st_size > 0
         except Exception:
             return False
     
-    def attempt_repair(self, input_path: Path) -> Optional[Path]:
-        """Attempt all repair strategies in order"""
-        temp_dir = Path(tempfile.mkdtemp())
-        strategies = [
-            self.repair_with_pptx,
-            self.repair_by_rezip,
-            self.repair_xml_relationships
-        ]
-        
-        for i, strategy in enumerate(strategies):
-            output_path = temp_dir / f"repaired_{i}_{input_path.name}"
-            if strategy(input_path, output_path):
-                if output_path.exists() and output_path.stat().st_size > 0:
-                    return output_path
+    def is_loadable(self, path: Path) -> bool:
+        """Check that python-pptx can open the file (always True if not installed)"""
+        if not PPTX_AVAILABLE:
+            return True
+        try:
+            Presentation(str(path))
+            return True
+        except Exception:
+            return False
+    
+    def attempt_repair(self, input_path: Path, output_path: Path) -> bool:
+        """
+        Attempt repair strategies cheapest-first, writing the first good result
+        to output_path. The plain rezip is validated with python-pptx instead of
+        running a separate load-and-resave pass.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            strategies = [
+                (self.repair_by_rezip, self.is_loadable),
+                (self.repair_xml_relationships, None),  # validates internally
+            ]
+            
+            for i, (strategy, validate) in enumerate(strategies):
+                candidate = temp_path / f"repaired_{i}_{input_path.name}"
+                if not strategy(input_path, candidate):
+                    continue
+                if not candidate.exists() or candidate.stat().st_size == 0:
+                    continue
+                if validate and not validate(candidate):
+                    continue
+                shutil.move(str(candidate), str(output_path))
+                return True
         
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def find_soffice() -> Optional[str]:
+    """Locate the LibreOffice soffice executable once per run (None if not installed)"""
+    found = shutil.which("soffice") or shutil.which("libreoffice")
+    if found:
+        return found
+
+    import platform
+    if platform.system() == "Linux":
         return None
 
+    possible_paths = [
+        r"C:\Program Files\LibreOffice\program\soffice.exe",
+        r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+        r"C:\Program Files\LibreOffice 7\program\soffice.exe",
+        r"C:\Program Files\LibreOffice 24\program\soffice.exe",
+    ]
+    for path in possible_paths:
+        if Path(path).exists():
+            return path
+    return None
+
+
+_one_shot_profiles = threading.local()
+
+
+def _unused_port() -> int:
+    """A TCP port on localhost that nothing is listening on right now"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def one_shot_profile_dir() -> Path:
+    """LibreOffice user profile for one-shot conversions, one per worker thread"""
+    profile_dir = getattr(_one_shot_profiles, "path", None)
+    if profile_dir is None:
+        profile_dir = Path(tempfile.mkdtemp(prefix=f"lo_{os.getpid()}_"))
+        atexit.register(shutil.rmtree, profile_dir, ignore_errors=True)
+        _one_shot_profiles.path = profile_dir
+    return profile_dir
+
+
+def run_soffice(cmd: List[str], timeout: int = 120) -> bool:
+    """
+    Run a one-shot soffice command; False on timeout. soffice is only a launcher
+    for soffice.bin, so a timeout kills the whole process tree, otherwise the hung
+    instance keeps the profile locked and every later run on it hands off and hangs.
+    """
+    if sys.platform == "win32":
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+    else:
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True,  # own process group, so killpg takes the children too
+        )
+    try:
+        proc.wait(timeout=timeout)
+        return True
+    except subprocess.TimeoutExpired:
+        kill_process_tree(proc)
+        return False
+    except BaseException:
+        # Ctrl+C never reaches the child's own session, so take it down here
+        kill_process_tree(proc)
+        raise
+
+
+def kill_process_tree(proc: subprocess.Popen):
+    """Kill a process and everything it started (POSIX: started with start_new_session)"""
+    if sys.platform == "win32":
+        subprocess.run(["taskkill", "/PID", str(proc.pid), "/T", "/F"], capture_output=True)
+    else:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+    proc.wait()
+
+
+class LibreOfficePool:
+    """
+    Pool of persistent headless LibreOffice instances driven through unoserver.
+    Each instance listens on its own UNO socket with a private user profile, so
+    files are converted without paying the soffice cold start every time.
+    Requires the 'unoserver' package (provides unoserver + unoconvert on PATH);
+    if it cannot start, size is 0 and callers use the one-shot soffice path.
+    Instances are only started on the first LibreOffice conversion (ensure_started),
+    so runs where COM or Aspose handle every file never pay the startup.
+    """
+    STARTUP_TIMEOUT = 30
+
+    def __init__(self, size: Optional[int] = None):
+        self.requested_size = size or self.default_size()
+        self.processes = []
+        self.ports = []
+        self.profile_dir = None
+        self._free_ports = queue.Queue()
+        self._process_by_port = {}
+        self._start_lock = threading.Lock()
+        self._started = False
+
+    @staticmethod
+    def default_size() -> int:
+        return max(1, min((os.cpu_count() or 2) // 2, 4))
+
+    @property
+    def size(self) -> int:
+        return len(self.ports)
+
+    def __enter__(self):
+        return self
+
+    def ensure_started(self) -> int:
+        """Start the instances on first use (once, thread-safe); returns size"""
+        with self._start_lock:
+            if not self._started:
+                self._started = True
+                try:
+                    self.start()
+                except Exception:
+                    self.stop()
+        return self.size
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """Spawn the soffice listeners and wait until each accepts connections"""
+        soffice = find_soffice()
+        unoserver = shutil.which("unoserver")
+        self.unoconvert = shutil.which("unoconvert")
+        if not (soffice and unoserver and self.unoconvert):
+            return
+
+        self.profile_dir = Path(tempfile.mkdtemp(prefix="lo_pool_"))
+        # stop() from __exit__ only runs on a clean unwind; never leave daemons behind
+        atexit.register(self.stop)
+        pending = []
+        for i in range(self.requested_size):
+            # Free ports, not fixed ones: another LibreOffice (or a second run of this
+            # script) already listening there would be mistaken for our instance
+            uno_port = _unused_port()
+            rpc_port = _unused_port()
+            profile = (self.profile_dir / f"lo_profile_{i}").as_uri()
+            proc = subprocess.Popen(
+                [unoserver, "--executable", soffice,
+                 "--interface", "127.0.0.1", "--port", str(rpc_port),
+                 "--uno-interface", "127.0.0.1", "--uno-port", str(uno_port),
+                 "--user-installation", profile],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=True,  # lets _drop kill unoserver and its soffice together
+            )
+            self.processes.append(proc)
+            pending.append((proc, rpc_port))
+
+        deadline = time.time() + self.STARTUP_TIMEOUT
+        for proc, rpc_port in pending:
+            while time.time() < deadline and proc.poll() is None:
+                try:
+                    with socket.create_connection(("127.0.0.1", rpc_port), timeout=0.5):
+                        pass
+                except OSError:
+                    time.sleep(0.2)
+                    continue
+                # Only count it if the listener is still our own, live process
+                if proc.poll() is None:
+                    self.ports.append(rpc_port)
+                    self._process_by_port[rpc_port] = proc
+                    self._free_ports.put(rpc_port)
+                break
+
+    def stop(self):
+        """Terminate all pool processes and remove their profiles"""
+        for proc in self.processes:
+            if proc.poll() is None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        self.processes = []
+        self.ports = []
+        self._process_by_port = {}
+        self._free_ports = queue.Queue()
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+            atexit.unregister(self.stop)
+
+    def convert(self, input_path: Path, output_path: Path) -> bool:
+        """Convert a file to PDF on the next idle instance (blocks until one is free)"""
+        # Poll rather than block forever: instances can be dropped while we wait
+        while True:
+            if not self.ports:
+                return False
+            try:
+                port = self._free_ports.get(timeout=1)
+                break
+            except queue.Empty:
+                continue
+
+        healthy = True
+        try:
+            if output_path.exists():
+                output_path.unlink()
+            subprocess.run(
+                [self.unoconvert, "--host", "127.0.0.1", "--port", str(port),
+                 "--convert-to", "pdf", str(input_path), str(output_path)],
+                capture_output=True, timeout=120,
+            )
+            return output_path.exists() and output_path.stat().st_size > 0
+        except subprocess.TimeoutExpired:
+            # The instance may still be stuck on this document; never hand it more work
+            healthy = False
+            return False
+        except Exception:
+            return False
+        finally:
+            if healthy:
+                self._free_ports.put(port)
+            else:
+                self._drop(port)
+
+    def _drop(self, port: int):
+        """Kill a wedged instance and take it out of the pool"""
+        proc = self._process_by_port.pop(port, None)
+        if port in self.ports:
+            self.ports.remove(port)
+        if proc is not None:
+            kill_process_tree(proc)
+            if proc in self.processes:
+                self.processes.remove(proc)
+
 
 class OfficeConverter:
     """Handles Office file to PDF conversion with multiple methods"""
     
-    def __init__(self):
+    def __init__(self, pool: Optional[LibreOfficePool] = None):
         self.pptx_repairer = PPTXRepair()
         self.docx_repairer = DOCXRepair()
+        self.pool = pool
     
     def convert_with_powerpoint(self, input_path: Path, output_path: Path) -> bool:
         """Convert using Microsoft PowerPoint via COM automation"""
@@ -375,21 +805,27 @@ class OfficeConverter:
     
     def convert_with_libreoffice(self, input_path: Path, output_path: Path) -> bool:
         """Convert using LibreOffice (cross-platform)"""
+        # Use the persistent instance pool when one is running
+        if self.pool and self.pool.ensure_started():
+            return self.pool.convert(input_path, output_path)
+
         import platform
         is_linux = platform.system() == "Linux"
 
-        if is_linux:
-            # On Linux, find soffice in PATH
-            soffice = shutil.which("soffice") or shutil.which("libreoffice")
-            if not soffice:
-                return False
+        soffice = find_soffice()
+        if not soffice:
+            return False
+
+        # Private profile: no clash with a user's running LibreOffice, so nothing to kill
+        profile_arg = f"-env:UserInstallation={one_shot_profile_dir().as_uri()}"
 
+        if is_linux:
             try:
-                subprocess.run(
-                    [soffice, "--headless", "--convert-to", "pdf",
-                     "--outdir", str(input_path.parent), str(input_path)],
-                    capture_output=True, text=True, timeout=120
-                )
+                if not run_soffice(
+                    [soffice, profile_arg, "--headless", "--convert-to", "pdf",
+                     "--outdir", str(input_path.parent), str(input_path)]
+                ):
+                    return False
                 # LibreOffice creates PDF next to input file
                 generated = input_path.with_suffix(".pdf")
                 if generated.exists():
@@ -400,49 +836,18 @@ class OfficeConverter:
                 return False
 
         else:
-            # Original Windows logic unchanged
-            possible_paths = [
-                r"C:\Program Files\LibreOffice\program\soffice.exe",
-                r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
-                r"C:\Program Files\LibreOffice 7\program\soffice.exe",
-                r"C:\Program Files\LibreOffice 24\program\soffice.exe",
-            ]
-            soffice = None
-            for path in possible_paths:
-                if Path(path).exists():
-                    soffice = path
-                    break
-            if not soffice:
-                return False
-
-            for process_name in ["soffice.exe", "soffice.bin"]:
-                try:
-                    subprocess.run(["taskkill", "/F", "/IM", process_name, "/T"],
-                                   capture_output=True, timeout=3)
-                except:
-                    pass
-            time.sleep(0.5)
-
+            # Windows one-shot conversion
             try:
                 if output_path.exists():
                     output_path.unlink()
-                cmd = [soffice, "--headless", "--convert-to", "pdf",
+                cmd = [soffice, profile_arg, "--headless", "--convert-to", "pdf",
                        "--outdir", str(output_path.parent), str(input_path)]
-                result = subprocess.run(
-                    cmd, capture_output=True, text=True, timeout=120,
-                    creationflags=subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
-                )
-                time.sleep(2)
+                # On timeout run_soffice kills this soffice's process tree (by PID)
+                if not run_soffice(cmd):
+                    return False
                 return output_path.exists() and output_path.stat().st_size > 0
             except Exception:
                 return False
-            finally:
-                for process_name in ["soffice.exe", "soffice.bin"]:
-                    try:
-                        subprocess.run(["taskkill", "/F", "/IM", process_name, "/T"],
-                                       capture_output=True, timeout=3)
-                    except:
-                        pass
     
     def convert_pptx_to_pdf(self, input_path: Path, output_path: Path) -> Tuple[bool, str]:
         """Convert PPTX to PDF with repair and multiple conversion methods"""
@@ -451,35 +856,25 @@ class OfficeConverter:
 
         if is_linux:
             # On Linux: try repair-then-libreoffice first (most reliable)
-            repaired_path = None
-
-            # Try python-pptx repair first
-            temp_dir = Path(tempfile.mkdtemp())
-            repaired_candidate = temp_dir / f"repaired_{input_path.name}"
+            with tempfile.TemporaryDirectory() as temp_dir:
+                repaired_path = None
+                repaired_candidate = Path(temp_dir) / f"repaired_{input_path.name}"
 
-            if self.pptx_repairer.repair_by_rezip_linux(input_path, repaired_candidate):
-                repaired_path = repaired_candidate
+                if self.pptx_repairer.repair_by_rezip_linux(input_path, repaired_candidate):
+                    repaired_path = repaired_candidate
 
-            target = repaired_path if repaired_path else input_path
-            method_suffix = " (repaired)" if repaired_path else ""
+                target = repaired_path if repaired_path else input_path
+                method_suffix = " (repaired)" if repaired_path else ""
 
-            if self.convert_with_libreoffice(target, output_path):
-                if output_path.exists() and output_path.stat().st_size > 0:
-                    try:
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                    except:
-                        pass
-                    return True, f"LibreOffice{method_suffix}"
+                if self.convert_with_libreoffice(target, output_path):
+                    if output_path.exists() and output_path.stat().st_size > 0:
+                        return True, f"LibreOffice{method_suffix}"
 
-            # Fallback: Aspose if available
-            if self.convert_with_aspose_slides(target, output_path):
-                if output_path.exists() and output_path.stat().st_size > 0:
-                    return True, f"Aspose.Slides{method_suffix}"
+                # Fallback: Aspose if available
+                if self.convert_with_aspose_slides(target, output_path):
+                    if output_path.exists() and output_path.stat().st_size > 0:
+                        return True, f"Aspose.Slides{method_suffix}"
 
-            try:
-                shutil.rmtree(temp_dir, ignore_errors=True)
-            except:
-                pass
             return False, "none"
 
         else:
@@ -488,25 +883,19 @@ class OfficeConverter:
                 if output_path.exists() and output_path.stat().st_size > 0:
                     return True, "PowerPoint COM"
 
-            repaired_path = self.pptx_repairer.attempt_repair(input_path)
-            if repaired_path:
-                methods = [
-                    (self.convert_with_powerpoint, "PowerPoint COM"),
-                    (self.convert_with_libreoffice, "LibreOffice"),
-                    (self.convert_with_aspose_slides, "Aspose.Slides")
-                ]
-                for method, method_name in methods:
-                    if method(repaired_path, output_path):
-                        if output_path.exists() and output_path.stat().st_size > 0:
-                            try:
-                                shutil.rmtree(repaired_path.parent, ignore_errors=True)
-                            except:
-                                pass
-                            return True, f"{method_name} (repaired)"
-                try:
-                    shutil.rmtree(repaired_path.parent, ignore_errors=True)
-                except:
-                    pass
+            # Office may still hold the repaired copy open, so don't fail on cleanup
+            with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as temp_dir:
+                repaired_path = Path(temp_dir) / f"repaired_{input_path.name}"
+                if self.pptx_repairer.attempt_repair(input_path, repaired_path):
+                    methods = [
+                        (self.convert_with_powerpoint, "PowerPoint COM"),
+                        (self.convert_with_libreoffice, "LibreOffice"),
+                        (self.convert_with_aspose_slides, "Aspose.Slides")
+                    ]
+                    for method, method_name in methods:
+                        if method(repaired_path, output_path):
+                            if output_path.exists() and output_path.stat().st_size > 0:
+                                return True, f"{method_name} (repaired)"
 
             for method, method_name in [
                 (self.convert_with_aspose_slides, "Aspose.Slides"),
@@ -559,10 +948,22 @@ class OfficeConverter:
 class PESUInteractiveDownloader:
     def __init__(self, username: str, password: str):
         self.session = requests.Session()
+        # Reuse one keep-alive connection pool for every request to the host
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=HTTP_POOL_MAXSIZE,
+            max_retries=Retry(
+                total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                raise_on_status=False,  # hand the last error response back to the caller
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip, deflate"})
         self.username = username
         self.password = password
         self.base_url = "https://www.pesuacademy.com/Academy"
         self.downloaded_files = []
+        self._downloaded_lock = threading.Lock()
 
     def logout(self):
         """Logout from PESU Academy and cleanup session"""
@@ -601,57 +1002,47 @@ class PESUInteractiveDownloader:
     def detect_file_type(self, file_path: Path) -> Optional[str]:
         """Detect actual file type from magic bytes and content structure"""
         try:
+            # Single read; all marker checks below run on bytes (no decode)
             with open(file_path, "rb") as f:
-                header = f.read(8)
+                head = f.read(2048)
             
             # Check magic bytes
-            if header.startswith(b'PK\x03\x04'):
+            if head.startswith(b'PK\x03\x04'):
                 # It's a ZIP file - could be Office format (DOCX/PPTX/XLSX)
-                # Read more content to check for Office format markers
-                with open(file_path, "rb") as f:
-                    content = f.read(2048)  # Read more bytes for better detection
-                    content_str = content.decode('latin-1', errors='ignore')
-                    
-                    # Check for specific Office document markers (order matters!)
-                    # DOCX has word/ directory structure
-                    if 'word/' in content_str or 'word/_rels' in content_str or '[Content_Types].xml' in content_str and 'wordprocessingml' in content_str:
-                        return '.docx'
-                    # PPTX has ppt/ directory structure
-                    elif 'ppt/' in content_str or 'ppt/_rels' in content_str or 'slideshow' in content_str.lower() or 'presentationml' in content_str:
-                        return '.pptx'
-                    # XLSX has xl/ directory structure
-                    elif 'xl/' in content_str or 'xl/_rels' in content_str or 'workbook' in content_str.lower() or 'spreadsheetml' in content_str:
-                        return '.xlsx'
-                    else:
-                        # If we can't determine, try to inspect ZIP contents
-                        try:
-                            import zipfile
-                            with zipfile.ZipFile(file_path, 'r') as zf:
-                                namelist = zf.namelist()
-                                if any('word/' in name for name in namelist):
-                                    return '.docx'
-                                elif any('ppt/' in name for name in namelist):
-                                    return '.pptx'
-                                elif any('xl/' in name for name in namelist):
-                                    return '.xlsx'
-                        except:
-                            pass
-                        # If still unknown, return None instead of guessing
-                        return None
-            elif header.startswith(b'%PDF'):
+                head_lower = head.lower()
+                
+                # Check for specific Office document markers (order matters!)
+                # DOCX has word/ directory structure
+                if b'word/' in head or b'[Content_Types].xml' in head and b'wordprocessingml' in head:
+                    return '.docx'
+                # PPTX has ppt/ directory structure
+                elif b'ppt/' in head or b'slideshow' in head_lower or b'presentationml' in head:
+                    return '.pptx'
+                # XLSX has xl/ directory structure
+                elif b'xl/' in head or b'workbook' in head_lower or b'spreadsheetml' in head:
+                    return '.xlsx'
+                else:
+                    # If we can't determine, try to inspect ZIP contents
+                    try:
+                        with zipfile.ZipFile(file_path, 'r') as zf:
+                            namelist = zf.namelist()
+                            if any('word/' in name for name in namelist):
+                                return '.docx'
+                            elif any('ppt/' in name for name in namelist):
+                                return '.pptx'
+                            elif any('xl/' in name for name in namelist):
+                                return '.xlsx'
+                    except:
+                        pass
+                    # If still unknown, return None instead of guessing
+                    return None
+            elif head.startswith(b'%PDF'):
                 return '.pdf'
-            elif header.startswith(b'\xd0\xcf\x11\xe0'):
+            elif head.startswith(b'\xd0\xcf\x11\xe0'):
                 # Old Office format (DOC/PPT/XLS) - compound file binary format
-                # Try to distinguish by reading more
-                with open(file_path, "rb") as f:
-                    content = f.read(2048)
-                    content_str = content.decode('latin-1', errors='ignore')
-                    if 'Word' in content_str or 'Microsoft Word' in content_str:
-                        return '.doc'
-                    elif 'PowerPoint' in content_str or 'Microsoft PowerPoint' in content_str:
-                        return '.ppt'
-                    else:
-                        return '.ppt'  # Default for old format
+                if b'Word' in head:
+                    return '.doc'
+                return '.ppt'  # PowerPoint or unknown - default for old format
             
             return None
         except Exception:
@@ -690,8 +1081,11 @@ class PESUInteractiveDownloader:
         # ── always try cache first ────────────────────────────────────
         if CACHE_FILE.exists():
             try:
-                with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                    cached = json.load(f)
+                if ORJSON_AVAILABLE:
+                    cached = orjson.loads(CACHE_FILE.read_bytes())
+                else:
+                    with open(CACHE_FILE, "r", encoding="utf-8") as f:
+                        cached = json.load(f)
                 courses = cached.get("courses", [])
                 saved_at = cached.get("_saved_at", 0)
                 age_str = self._cache_age_str(saved_at)
@@ -722,21 +1116,23 @@ class PESUInteractiveDownloader:
         if response.status_code != 200:
             raise Exception("Failed to fetch courses")
 
-        soup = BeautifulSoup(response.text, "html.parser")
         courses = []
-        for option in soup.find_all("option"):
-            course_id = option.get("value")
-            course_name = option.text.strip()
+        for course_id, course_name in parse_options(response.content, declared_charset(response)):
             if course_id and course_name:
-                course_id = str(course_id).strip().replace('\\"', "").replace("\\'", "").strip('"').strip("'").replace("\\", "")
+                course_id = clean_id(course_id)
                 subject_code = course_name.split("-")[0].strip() if "-" in course_name else course_name
                 courses.append({"id": course_id, "subjectCode": subject_code, "subjectName": course_name})
 
         print(f"{Fore.GREEN}  Found {len(courses)} courses  {Fore.YELLOW}({t.pretty()}){Style.RESET_ALL}")
 
         try:
-            with open(CACHE_FILE, "w", encoding="utf-8") as f:
-                json.dump({"_saved_at": time.time(), "courses": courses}, f, indent=2, ensure_ascii=False)
+            payload = {"_saved_at": time.time(), "courses": courses}
+            if ORJSON_AVAILABLE:
+                # C serializer, writes UTF-8 bytes directly (same layout as indent=2)
+                CACHE_FILE.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+            else:
+                with open(CACHE_FILE, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, indent=2, ensure_ascii=False)
             print(f"  {Fore.CYAN}Saved to courses.json{Style.RESET_ALL}")
         except Exception as e:
             print(f"  {Fore.YELLOW}⚠ Could not save cache: {e}{Style.RESET_ALL}")
@@ -763,26 +1159,16 @@ class PESUInteractiveDownloader:
             "4": ["UE22"],
             "5": ["UE21"],
             "6": ["UE20"],
-            "7": ["UE25", "UE24", "UE23", "UE22", "UE21", "UE20"],
+            "7": list(YEAR_PRIORITY),
         }
         
-        prefixes = filter_map.get(choice, ["UE23"])
+        prefixes = set(filter_map.get(choice, ["UE23"]))
         
-        # Filter courses
-        filtered = [
-            c for c in courses
-            if any(c["subjectCode"].startswith(prefix) for prefix in prefixes)
-        ]
+        # Filter courses (all prefixes are 4 chars, so one slice + set lookup per course)
+        filtered = [c for c in courses if c["subjectCode"][:4] in prefixes]
         
         # Sort by year (newest first) then alphabetically
-        def get_year_priority(course):
-            code = course["subjectCode"]
-            for i, prefix in enumerate(["UE25", "UE24", "UE23", "UE22", "UE21", "UE20"]):
-                if code.startswith(prefix):
-                    return i
-            return 99
-
-        filtered.sort(key=lambda c: (get_year_priority(c), c["subjectCode"]))
+        filtered.sort(key=lambda c: (YEAR_PRIORITY[c["subjectCode"][:4]], c["subjectCode"]))
 
         year_names = {
             "1": "2025-26",
@@ -801,17 +1187,11 @@ class PESUInteractiveDownloader:
         """Get all units for a course"""
         url = f"{self.base_url}/a/i/getCourse/{course_id}"
         response = self.session.get(url)
-        soup = BeautifulSoup(response.text, "html.parser")
-        options = soup.find_all("option")
 
         units = []
-        for option in options:
-            unit_id = option.get("value")
-            unit_name = option.text.strip()
+        for unit_id, unit_name in parse_options(response.content, declared_charset(response)):
             if unit_id and unit_name:
-                unit_id = (
-                    str(unit_id).strip().replace("\\", "").strip('"').strip("'")
-                )
+                unit_id = clean_id(unit_id)
                 units.append({"id": unit_id, "name": unit_name})
 
         return units
@@ -821,30 +1201,38 @@ class PESUInteractiveDownloader:
         url = f"{self.base_url}/a/i/getCourseClasses/{unit_id}"
         response = self.session.get(url)
 
-        html_content = (
-            response.json()
-            if response.headers.get("Content-Type", "").startswith("application/json")
-            else response.text
-        )
-        soup = BeautifulSoup(html_content, "html.parser")
-        options = soup.find_all("option")
+        if response.headers.get("Content-Type", "").startswith("application/json"):
+            data = response.json()
+            if isinstance(data, dict):
+                data = data.get("html", "")
+            if isinstance(data, list):
+                # Structured listing: read id/name fields directly, no HTML parse
+                options = [
+                    (item.get("id"), str(item.get("name", "")).strip())
+                    for item in data if isinstance(item, dict)
+                ]
+            else:
+                # JSON-encoded HTML fragment
+                options = parse_options(data if isinstance(data, str) else "")
+        else:
+            options = parse_options(response.content, declared_charset(response))
 
         classes = []
-        for option in options:
-            class_id = option.get("value")
-            class_name = option.text.strip()
+        for class_id, class_name in options:
             if class_id and class_name:
-                class_id = (
-                    str(class_id).strip().replace("\\", "").strip('"').strip("'")
-                )
+                class_id = clean_id(class_id)
                 classes.append({"id": class_id, "name": class_name})
 
         return classes
 
     def get_resource_links(
-        self, course_id: str, class_id: str, resource_type_id: str
+        self, course_id: str, class_id: str, resource_type_id: str,
+        spool_dir: Optional[Path] = None,
     ) -> List[Dict]:
-        """Get download links for a specific resource type"""
+        """
+        Get download links for a specific resource type.
+        A direct file response is saved into spool_dir (system temp if None) right away.
+        """
         url = f"{self.base_url}/s/studentProfilePESUAdmin"
         params = {
             "url": "studentProfilePESUAdmin",
@@ -855,60 +1243,153 @@ class PESUInteractiveDownloader:
             "unitid": class_id,
         }
 
-        response = self.session.get(url, params=params)
+        response = self.session.get(url, params=params, stream=True)
 
-        # Check if direct file download
+        # Check if direct file download. Listings for every unit are fetched before
+        # anything downloads, so spool the body to disk now rather than hold the
+        # connection open (or request it again); _download_one moves it into place
         content_type = response.headers.get("Content-Type", "")
         if "application/" in content_type and "html" not in content_type:
-            return [
-                {"type": "direct", "url": response.url, "content": response.content}
-            ]
+            link = {"type": "direct", "response": response, "path": None, "error": None}
+            fd, spool_path = tempfile.mkstemp(prefix="direct_", dir=spool_dir)
+            try:
+                response.raw.decode_content = True
+                with os.fdopen(fd, "wb") as f:
+                    shutil.copyfileobj(response.raw, f, length=COPY_CHUNK_SIZE)
+                link["path"] = Path(spool_path)
+            except Exception as e:
+                # Reported when the file's download job runs, like any other failure
+                os.unlink(spool_path)
+                link["error"] = e
+            finally:
+                response.close()
+            return [link]
 
-        # Parse HTML for download links
-        soup = BeautifulSoup(response.text, "html.parser")
+        # Scan the raw HTML bytes for onclick handlers (no DOM build); only the
+        # attribute values are decoded and unescaped, in document order
+        encoding = declared_charset(response) or "utf-8"
         download_links = []
-
-        # Look for various download patterns
-        for element in soup.find_all(onclick=True):
-            onclick = element.get("onclick", "")
-            text = element.text.strip()
+        for match in _RE_ONCLICK.finditer(_RE_HTML_COMMENT.sub(b"", response.content)):
+            value = next(group for group in match.groups() if group is not None)
+            onclick = html.unescape(value.decode(encoding, "replace"))
 
             # Pattern 1: downloadslidecoursedoc in loadIframe
             if "downloadslidecoursedoc" in onclick:
-                match = re.search(r"loadIframe\('([^']+)'", onclick)
-                if match:
-                    download_url = match.group(1).split("#")[0]
+                link_match = _RE_LOAD_IFRAME.search(onclick)
+                if link_match:
+                    download_url = link_match.group(1).split("#")[0]
                     if download_url.startswith("/Academy"):
                         full_url = f"https://www.pesuacademy.com{download_url}"
                         download_links.append(
-                            {"type": "link", "url": full_url, "text": text}
+                            {"type": "link", "url": full_url, "text": ""}
                         )
 
             # Pattern 2: downloadcoursedoc
             elif "downloadcoursedoc" in onclick:
-                match = re.search(r"downloadcoursedoc\('([^']+)'", onclick)
-                if match:
-                    doc_id = match.group(1)
+                link_match = _RE_DOWNLOAD_DOC.search(onclick)
+                if link_match:
                     full_url = (
-                        f"{self.base_url}/s/referenceMeterials/downloadcoursedoc/{doc_id}"
+                        f"{self.base_url}/s/referenceMeterials/downloadcoursedoc/{link_match.group(1)}"
                     )
                     download_links.append(
-                        {"type": "link", "url": full_url, "text": text}
+                        {"type": "link", "url": full_url, "text": ""}
                     )
 
         return download_links
 
+    def get_all_classes(self, unit_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Fetch classes for several units concurrently, keyed by unit id"""
+        if not unit_ids:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(METADATA_WORKERS, len(unit_ids))) as executor:
+            results = executor.map(self.get_classes, unit_ids)
+            return dict(zip(unit_ids, results))
+
+    def get_all_resource_links(
+        self, course_id: str, pairs: List[Tuple[str, str]], spool_dir: Optional[Path] = None
+    ) -> Dict[Tuple[str, str], List[Dict]]:
+        """Fetch resource links for (class_id, resource_type_id) pairs concurrently"""
+        if not pairs:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(METADATA_WORKERS, len(pairs))) as executor:
+            results = executor.map(
+                lambda pair: self.get_resource_links(course_id, pair[0], pair[1], spool_dir), pairs
+            )
+            return dict(zip(pairs, results))
+
     def get_filename_from_response(self, response) -> Optional[str]:
         """Extract filename from response headers"""
         content_disp = response.headers.get("Content-Disposition", "")
         if "filename=" in content_disp:
-            match = re.search(
-                r'filename[*]?=["\']?(?:UTF-8\'\')?([^"\';\n]+)', content_disp
-            )
+            match = _RE_FILENAME.search(content_disp)
             if match:
                 return match.group(1).strip()
         return None
 
+    def _download_one(self, job: DownloadJob) -> Optional[Tuple[Path, Path, int]]:
+        """
+        Download a single resource to disk.
+        Returns (written path, path with the correct extension, size), or None if
+        the file was empty. Renaming to the corrected path is left to the caller.
+        """
+        link = job.link
+
+        if link["type"] == "direct":
+            # Direct download: the listing request returned the file, already spooled
+            if link["error"]:
+                raise link["error"]
+            response = link["response"]
+        else:
+            # Download from link
+            headers = {
+                "Referer": f"{self.base_url}/s/studentProfilePESU"
+            }
+            response = self.session.get(
+                link["url"], headers=headers, stream=True
+            )
+
+        # Pick extension from the headers; a filename from Content-Disposition wins
+        header_ext = ext_from_content_type(response.headers.get("Content-Type", ""), default=None)
+        server_name = self.get_filename_from_response(response)
+        server_ext = Path(server_name).suffix.lower() if server_name else ""
+        if server_ext in KNOWN_EXTENSIONS:
+            header_ext = server_ext
+        ext = header_ext or ".pdf"
+
+        # Clean filename: number.ClassName.ext (using resource-specific counter)
+        output_path = job.resource_dir / f"{job.stem}{ext}"
+
+        # Save the file (copyfileobj runs the copy loop in C with 1 MiB reads)
+        try:
+            if link["type"] == "direct":
+                shutil.move(link["path"], output_path)
+            else:
+                response.raw.decode_content = True
+                with open(output_path, "wb") as f:
+                    shutil.copyfileobj(response.raw, f, length=COPY_CHUNK_SIZE)
+        except Exception:
+            # Never leave a truncated file behind under a valid name
+            try:
+                output_path.unlink()
+            except FileNotFoundError:
+                pass
+            raise
+        finally:
+            response.close()
+
+        size = output_path.stat().st_size
+        if size == 0:
+            output_path.unlink()
+            return None
+
+        # Only sniff magic bytes when the server didn't tell us the type
+        final_path = output_path
+        actual_ext = None if header_ext else self.detect_file_type(output_path)
+        if actual_ext and actual_ext != ext:
+            final_path = job.resource_dir / f"{job.stem}{actual_ext}"
+
+        return output_path, final_path, size
+
     def download_resources(
         self,
         course_id: str,
@@ -916,8 +1397,12 @@ class PESUInteractiveDownloader:
         selected_units: List[int],
         selected_resources: List[str],
         base_dir: Path,
+        on_saved: Optional[Callable[[Path], None]] = None,
     ):
-        """Download selected resources for selected units"""
+        """
+        Download selected resources for selected units.
+        If given, on_saved is called with each file's final path once its unit is done.
+        """
         # Validate session before starting downloads
         self.validate_session()
         
@@ -929,149 +1414,282 @@ class PESUInteractiveDownloader:
         for unit_idx in selected_units:
             if unit_idx > len(units):
                 print(f"{Fore.YELLOW}⚠ Unit {unit_idx} not found, skipping{Style.RESET_ALL}")
-                continue
+        selected_units = [idx for idx in selected_units if idx <= len(units)]
 
-            unit = units[unit_idx - 1]
-            print(f"\n{Fore.BLUE}{'='*70}{Style.RESET_ALL}")
-            print(f"{Fore.BLUE}Unit {unit_idx}: {unit['name']}{Style.RESET_ALL}")
-            print(f"{Fore.BLUE}{'='*70}{Style.RESET_ALL}")
-
-            classes = self.get_classes(unit["id"])
-            print(f"Found {len(classes)} classes")
-
-            # Create unit directory
-            unit_dir = base_dir / f"Unit_{unit_idx}"
-            unit_dir.mkdir(parents=True, exist_ok=True)
-
-            # Initialize counters for each resource type (separate counter per resource type)
-            resource_counters = {res_id: 1 for res_id in selected_resources}
-
-            # Process each class
-            for class_idx, cls in enumerate(classes, 1):
-                print(f"\n[{class_idx}/{len(classes)}] {cls['name']}")
-
-                # Clean class name for filename
-                safe_class_name = "".join(
-                    c if c.isalnum() or c in (" ", "-", "_") else "_"
-                    for c in cls["name"]
-                ).strip()[:60]
-                safe_class_name = "_".join(safe_class_name.split())
-
-                # Try selected resource types
-                for resource_id in selected_resources:
-                    resource_name = RESOURCE_TYPES[resource_id]
-                    links = self.get_resource_links(course_id, cls["id"], resource_id)
-
-                    if links:
-                        print(f"  {resource_name}: {len(links)} file(s)")
-
-                        # Create resource type folder directly under unit (simplified structure)
-                        resource_dir = unit_dir / resource_name
-                        resource_dir.mkdir(parents=True, exist_ok=True)
-
-                        # Download each file (use resource-specific counter)
-                        for link in links:
-                            current_counter = resource_counters[resource_id]
-                            
-                            if link["type"] == "direct":
-                                # Direct download
-                                filename = f"{current_counter}.{safe_class_name}.pdf"
-                                output_path = resource_dir / filename
-                                with open(output_path, "wb") as f:
-                                    f.write(link["content"])
-                                if output_path.stat().st_size > 0:
-                                    # Detect actual file type from magic bytes
-                                    actual_ext = self.detect_file_type(output_path)
-                                    if actual_ext and actual_ext != '.pdf':
-                                        # Rename with correct extension
-                                        new_filename = f"{current_counter}.{safe_class_name}{actual_ext}"
-                                        new_path = resource_dir / new_filename
-                                        output_path.rename(new_path)
-                                        output_path = new_path
-                                        filename = new_filename
-                                    
-                                    print(
-                                        f"    [OK] {filename} ({output_path.stat().st_size:,} bytes)"
-                                    )
-                                    total_downloaded += 1
-                                    self.downloaded_files.append(output_path)
-                                    resource_counters[resource_id] += 1  # Increment resource-specific counter
-                            else:
-                                # Download from link
-                                headers = {
-                                    "Referer": f"{self.base_url}/s/studentProfilePESU"
-                                }
-                                response = self.session.get(
-                                    link["url"], headers=headers, stream=True
-                                )
-
-                                # Generate clean filename with sequential number
-                                ext = ".pdf"
-                                content_type = response.headers.get("Content-Type", "")
-                                if "application/vnd.openxmlformats" in content_type:
-                                    if "presentation" in content_type:
-                                        ext = ".pptx"
-                                    elif "word" in content_type:
-                                        ext = ".docx"
-                                    elif "sheet" in content_type:
-                                        ext = ".xlsx"
-                                elif "application/vnd.ms-powerpoint" in content_type:
-                                    ext = ".ppt"
-                                elif "application/msword" in content_type:
-                                    ext = ".doc"
-                                
-                                # Clean filename: number.ClassName.ext (using resource-specific counter)
-                                filename = f"{current_counter}.{safe_class_name}{ext}"
-
-                                output_path = resource_dir / filename
-
-                                # Save the file
-                                with open(output_path, "wb") as f:
-                                    for chunk in response.iter_content(chunk_size=8192):
-                                        f.write(chunk)
-
-                                if output_path.stat().st_size > 0:
-                                    # Detect actual file type from magic bytes
-                                    actual_ext = self.detect_file_type(output_path)
-                                    if actual_ext and actual_ext != ext:
-                                        # Rename with correct extension
-                                        new_filename = f"{current_counter}.{safe_class_name}{actual_ext}"
-                                        new_path = resource_dir / new_filename
-                                        output_path.rename(new_path)
-                                        output_path = new_path
-                                        filename = new_filename
-                                    
-                                    print(
-                                        f"    [OK] {filename} ({output_path.stat().st_size:,} bytes)"
-                                    )
-                                    total_downloaded += 1
-                                    self.downloaded_files.append(output_path)
-                                    resource_counters[resource_id] += 1  # Increment resource-specific counter
-                                else:
-                                    print(f"    [SKIP] {filename} (empty file, deleted)")
-                                    output_path.unlink()
+        # Direct file responses are spooled here while the listings are fetched
+        base_dir.mkdir(parents=True, exist_ok=True)
+        spool_dir = Path(tempfile.mkdtemp(prefix=".direct_", dir=base_dir))
+        try:
+            # Precompute the full link graph up-front so metadata requests overlap
+            with Spinner("Fetching class and resource listings"):
+                classes_by_unit = self.get_all_classes(
+                    [units[idx - 1]["id"] for idx in selected_units]
+                )
+                pairs = [
+                    (cls["id"], resource_id)
+                    for unit_classes in classes_by_unit.values()
+                    for cls in unit_classes
+                    for resource_id in selected_resources
+                ]
+                links_by_pair = self.get_all_resource_links(course_id, pairs, spool_dir)
+
+            for unit_idx in selected_units:
+                unit = units[unit_idx - 1]
+                print(f"\n{Fore.BLUE}{'='*70}{Style.RESET_ALL}")
+                print(f"{Fore.BLUE}Unit {unit_idx}: {unit['name']}{Style.RESET_ALL}")
+                print(f"{Fore.BLUE}{'='*70}{Style.RESET_ALL}")
+
+                classes = classes_by_unit[unit["id"]]
+                print(f"Found {len(classes)} classes")
+
+                # Create unit directory
+                unit_dir = base_dir / f"Unit_{unit_idx}"
+                unit_dir.mkdir(parents=True, exist_ok=True)
+
+                # Initialize counters for each resource type (separate counter per resource type)
+                resource_counters = {res_id: 1 for res_id in selected_resources}
+
+                # Pass 1: build jobs in class order so counters stay sequential
+                jobs = []
+                for class_idx, cls in enumerate(classes, 1):
+                    print(f"\n[{class_idx}/{len(classes)}] {cls['name']}")
+
+                    # Clean class name for filename
+                    safe_class_name = safe_name(cls["name"])
+
+                    # Try selected resource types
+                    for resource_id in selected_resources:
+                        resource_name = RESOURCE_TYPES[resource_id]
+                        links = links_by_pair.get((cls["id"], resource_id), [])
+
+                        if links:
+                            print(f"  {resource_name}: {len(links)} file(s)")
+
+                            # Create resource type folder directly under unit (simplified structure)
+                            resource_dir = unit_dir / resource_name
+                            resource_dir.mkdir(parents=True, exist_ok=True)
+
+                            # Queue each file (use resource-specific counter)
+                            for link in links:
+                                jobs.append(DownloadJob(link, resource_dir,
+                                                        resource_counters[resource_id], safe_class_name))
+                                resource_counters[resource_id] += 1
+
+                if not jobs:
+                    continue
+
+                # Pass 2: download concurrently over the shared keep-alive pool
+                print(f"\n  Downloading {len(jobs)} file(s)...")
+                saved = []
+                with ThreadPoolExecutor(max_workers=min(DOWNLOAD_WORKERS, len(jobs))) as executor:
+                    futures = {executor.submit(self._download_one, job): job for job in jobs}
+                    for future in as_completed(futures):
+                        job = futures[future]
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            print(f"    {Fore.RED}[FAIL]{Style.RESET_ALL} {job.label}: {e}")
+                            continue
+
+                        if result is None:
+                            print(f"    [SKIP] {job.label} (empty file, deleted)")
+                            continue
+
+                        output_path, final_path, size = result
+                        total_downloaded += 1
+                        saved.append((job, output_path, final_path, size))
+
+                # Once the unit is done, apply extension corrections and renumber each
+                # resource folder so skipped/failed files leave no gaps (1, 2, 3, ...).
+                # Ascending order: a file only ever moves down into a slot already vacated.
+                saved.sort(key=lambda item: (str(item[0].resource_dir), item[0].index))
+                next_index = {}
+                final_paths = []
+                for job, output_path, final_path, size in saved:
+                    index = next_index.get(job.resource_dir, 1)
+                    next_index[job.resource_dir] = index + 1
+                    if index != job.index:
+                        final_path = job.resource_dir / f"{index}.{job.class_name}{final_path.suffix}"
+                    if final_path != output_path:
+                        # os.replace: a same-named file from an earlier run must not abort (Windows)
+                        os.replace(output_path, final_path)
+                    print(f"    [OK] {final_path.name} ({size:,} bytes)")
+                    final_paths.append(final_path)
+                with self._downloaded_lock:
+                    self.downloaded_files.extend(final_paths)
+                if on_saved:
+                    for final_path in final_paths:
+                        on_saved(final_path)
+        finally:
+            shutil.rmtree(spool_dir, ignore_errors=True)
 
         print(f"\n{Fore.GREEN}{'='*70}{Style.RESET_ALL}")
         print(f"{Fore.GREEN}✓ Downloaded {total_downloaded} files{Style.RESET_ALL}")
         print(f"{Fore.GREEN}{'='*70}{Style.RESET_ALL}")
 
 
-def convert_office_to_pdf(input_folder: Path) -> List[Path]:
+def scan_download_tree(base_dir: Path) -> FileTree:
+    """
+    Walk base_dir once (iterative scandir) and collect what conversion, merging
+    and cleanup need, so none of them has to re-walk the folder.
+    """
+    tree = FileTree(base_dir)
+    pdfs = {}   # (unit, resource) -> [(sort key, path, size)]
+    dirs = []   # (depth, path)
+    stack = deque([(str(base_dir), ())])
+    while stack:
+        dir_path, rel = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        sub = rel + (entry.name,)
+                        if len(sub) == 1 and entry.name.startswith("Unit_"):
+                            tree.units[entry.name] = {}
+                        dirs.append((len(sub), entry.path))
+                        stack.append((entry.path, sub))
+                    elif entry.is_file(follow_symlinks=False):
+                        name = os.path.normcase(entry.name)
+                        if _RE_UNWANTED.match(name):
+                            tree.unwanted.append(Path(entry.path))
+                        if entry.name.lower().endswith(OFFICE_EXTENSIONS):
+                            tree.office_files.append(Path(entry.path))
+                        elif name.endswith(".pdf") and len(rel) == 2 and rel[0] in tree.units:
+                            pdfs.setdefault(rel, []).append(
+                                (natural_sort_key(entry.name), entry.path, entry.stat().st_size)
+                            )
+        except OSError:
+            continue
+
+    # Natural order so Unit_10 follows Unit_9 and 10.x.pdf follows 9.x.pdf
+    tree.units = {u: tree.units[u] for u in sorted(tree.units, key=natural_sort_key)}
+    for (unit, resource), entries in pdfs.items():
+        entries.sort(key=lambda e: e[0])
+        tree.units[unit][resource] = ([Path(path) for _, path, _ in entries],
+                                      sum(size for _, _, size in entries))
+
+    dirs.sort(key=lambda d: d[0], reverse=True)
+    tree.dirs = [Path(path) for _, path in dirs]
+    return tree
+
+
+def _convert_one(converter: OfficeConverter, office_file: Path) -> Tuple[Path, Path, bool, str, Optional[str]]:
+    """Convert a single Office file, returning (source, pdf, success, method, error)"""
+    pdf_file = office_file.with_suffix(".pdf")
+    ext = office_file.suffix.lower()
+    try:
+        if ext in ['.pptx', '.ppt']:
+            success, method = converter.convert_pptx_to_pdf(office_file, pdf_file)
+        elif ext in ['.docx', '.doc']:
+            success, method = converter.convert_docx_to_pdf(office_file, pdf_file)
+        else:
+            success, method = False, "none"
+        return office_file, pdf_file, success, method, None
+    except Exception as e:
+        return office_file, pdf_file, False, "none", str(e)
+
+
+def _conversion_workers() -> int:
+    """Number of files to convert concurrently (also the LibreOffice pool size)"""
+    # COM automation must stay on the main thread. Otherwise one worker per pool
+    # instance, or as many one-shot soffice runs (each with its own profile)
+    if COMTYPES_AVAILABLE:
+        return 1
+    return LibreOfficePool.default_size() if find_soffice() else 1
+
+
+def _convert_batch(converter: OfficeConverter, office_files: List[Path], workers: int,
+                   executor: Optional[ThreadPoolExecutor] = None):
+    """
+    Convert files, yielding _convert_one results in completion order.
+    Pass a long-lived executor to keep the same worker threads (and so the same
+    per-thread LibreOffice profiles) across batches.
+    """
+    if executor is not None:
+        futures = [executor.submit(_convert_one, converter, f) for f in office_files]
+        for future in as_completed(futures):
+            yield future.result()
+    elif workers > 1 and len(office_files) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_convert_one, converter, f) for f in office_files]
+            for future in as_completed(futures):
+                yield future.result()
+    else:
+        for office_file in office_files:
+            yield _convert_one(converter, office_file)
+
+
+def _report_conversion(label: str, result, stats: Dict, converted_files: List[Path], failed_files: List[str]):
+    """Print one conversion result and update the running totals"""
+    office_file, pdf_file, success, method, error = result
+    print(f"  [{label}] {office_file.name}")
+
+    if error:
+        print(f"    {_FAIL_MARK} Error: {error[:60]}")
+        if len(failed_files) < FAILED_FILES_SHOWN:
+            failed_files.append(office_file.name)
+        stats['failed'] += 1
+    elif success:
+        size = pdf_file.stat().st_size
+        print(f"    {_OK_MARK} Converted using {method} ({size:,} bytes)")
+        converted_files.append(pdf_file)
+        
+        if "repaired" in method:
+            stats['repaired'] += 1
+        else:
+            stats['success'] += 1
+        
+        # Clean up source file after successful conversion
+        try:
+            office_file.unlink()
+        except:
+            pass
+    else:
+        print(f"    {_FAIL_MARK} Failed - no conversion method succeeded")
+        if len(failed_files) < FAILED_FILES_SHOWN:
+            failed_files.append(office_file.name)
+        stats['failed'] += 1
+
+
+def _print_conversion_summary(total: int, stats: Dict, failed_files: List[str]):
+    """Print the end-of-conversion summary block"""
+    print(f"\n{Fore.GREEN}{'='*70}{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}✓ Conversion complete:{Style.RESET_ALL}")
+    print(f"  Total files:           {total}")
+    print(f"  Successful:            {stats['success']}")
+    print(f"  Repaired + converted:  {stats['repaired']}")
+    print(f"  Failed:                {stats['failed']}")
+    
+    if stats['success'] + stats['repaired'] > 0:
+        success_rate = ((stats['success'] + stats['repaired']) / total) * 100
+        print(f"  Success rate:          {success_rate:.1f}%")
+    
+    if failed_files:
+        print(f"\n{Fore.YELLOW}Failed files:{Style.RESET_ALL}")
+        for fname in failed_files:  # only the first FAILED_FILES_SHOWN are kept
+            print(f"  • {fname}")
+        if stats['failed'] > len(failed_files):
+            print(f"  ... and {stats['failed'] - len(failed_files)} more")
+    
+    print(f"{Fore.GREEN}{'='*70}{Style.RESET_ALL}")
+
+
+def convert_office_to_pdf(tree: FileTree, heading: str = "[5/7] Converting files to PDF...") -> List[Path]:
     """Convert DOCX/PPTX files to PDF using advanced conversion methods"""
-    print(f"\n{Fore.CYAN}[5/7] Converting files to PDF...{Style.RESET_ALL}")
+    print(f"\n{Fore.CYAN}{heading}{Style.RESET_ALL}")
     
-    # Find all Office files first to determine what we're converting
-    office_files = []
-    for ext in ["*.docx", "*.pptx", "*.doc", "*.ppt"]:
-        office_files.extend(input_folder.rglob(ext))
+    # Office files were found by scan_download_tree
+    office_files = tree.office_files
     
     if not office_files:
         print(f"{Fore.YELLOW}No Office files to convert{Style.RESET_ALL}")
         return []
     
-    # Detect file types present
-    has_pptx = any(f.suffix.lower() in ['.pptx', '.ppt'] for f in office_files)
-    has_docx = any(f.suffix.lower() in ['.docx', '.doc'] for f in office_files)
+    # Detect file types present (one pass over the list)
+    pptx_count = sum(1 for f in office_files if f.suffix.lower() in ('.pptx', '.ppt'))
+    docx_count = len(office_files) - pptx_count
+    has_pptx = pptx_count > 0
+    has_docx = docx_count > 0
     
     # Check for python-docx availability
     try:
@@ -1112,110 +1730,195 @@ def convert_office_to_pdf(input_folder: Path) -> List[Path]:
     
     print(f"\nFound {len(office_files)} Office files to convert")
     if has_pptx and has_docx:
-        pptx_count = sum(1 for f in office_files if f.suffix.lower() in ['.pptx', '.ppt'])
-        docx_count = sum(1 for f in office_files if f.suffix.lower() in ['.docx', '.doc'])
         print(f"  • PowerPoint: {pptx_count} file(s)")
         print(f"  • Word: {docx_count} file(s)")
     print()
     
-    converter = OfficeConverter()
     converted_files = []
     failed_files = []
     stats = {'success': 0, 'repaired': 0, 'failed': 0}
     
-    for idx, office_file in enumerate(office_files, 1):
-        print(f"  [{idx}/{len(office_files)}] {office_file.name}")
-        pdf_file = office_file.with_suffix(".pdf")
-        
-        # Determine file type and convert
-        ext = office_file.suffix.lower()
-        success = False
-        method = "none"
-        
-        try:
-            if ext in ['.pptx', '.ppt']:
-                success, method = converter.convert_pptx_to_pdf(office_file, pdf_file)
-            elif ext in ['.docx', '.doc']:
-                success, method = converter.convert_docx_to_pdf(office_file, pdf_file)
-            
-            if success:
-                size = pdf_file.stat().st_size
-                print(f"    {Fore.GREEN}✓{Style.RESET_ALL} Converted using {method} ({size:,} bytes)")
-                converted_files.append(pdf_file)
-                
-                if "repaired" in method:
-                    stats['repaired'] += 1
-                else:
-                    stats['success'] += 1
-                
-                # Clean up source file after successful conversion
-                try:
-                    office_file.unlink()
-                except:
-                    pass
-            else:
-                print(f"    {Fore.RED}✗{Style.RESET_ALL} Failed - no conversion method succeeded")
-                failed_files.append(office_file.name)
-                stats['failed'] += 1
-        
-        except Exception as e:
-            print(f"    {Fore.RED}✗{Style.RESET_ALL} Error: {str(e)[:60]}")
-            failed_files.append(office_file.name)
-            stats['failed'] += 1
-    
-    # Summary
-    print(f"\n{Fore.GREEN}{'='*70}{Style.RESET_ALL}")
-    print(f"{Fore.GREEN}✓ Conversion complete:{Style.RESET_ALL}")
-    print(f"  Total files:           {len(office_files)}")
-    print(f"  Successful:            {stats['success']}")
-    print(f"  Repaired + converted:  {stats['repaired']}")
-    print(f"  Failed:                {stats['failed']}")
-    
-    if stats['success'] + stats['repaired'] > 0:
-        success_rate = ((stats['success'] + stats['repaired']) / len(office_files)) * 100
-        print(f"  Success rate:          {success_rate:.1f}%")
-    
-    if failed_files:
-        print(f"\n{Fore.YELLOW}Failed files:{Style.RESET_ALL}")
-        for fname in failed_files[:10]:  # Show first 10
-            print(f"  • {fname}")
-        if len(failed_files) > 10:
-            print(f"  ... and {len(failed_files) - 10} more")
+    # Warm LibreOffice instances for the whole batch, started on the first fallback
+    workers = _conversion_workers()
+    with LibreOfficePool(workers) as pool:
+        converter = OfficeConverter(pool)
+        results = _convert_batch(converter, office_files, workers)
+        for idx, result in enumerate(results, 1):
+            _report_conversion(f"{idx}/{len(office_files)}", result, stats, converted_files, failed_files)
     
-    print(f"{Fore.GREEN}{'='*70}{Style.RESET_ALL}")
+    _print_conversion_summary(len(office_files), stats, failed_files)
     
     return converted_files
 
 
-def natural_sort_key(path: Path) -> list:
+class ConversionPipeline:
+    """
+    Background Office -> PDF conversion fed by download_resources.
+    Files are queued as they are saved and converted in batches of up to
+    BATCH_SIZE, so conversion overlaps the remaining downloads. Not usable with
+    COM automation, which has to run on the main thread.
+    """
+    BATCH_SIZE = 8
+    _DONE = object()  # sentinel: flush and stop
+
+    def __init__(self):
+        # Unbounded: it only holds paths, and submit() must never stall the downloads
+        self.queue = queue.Queue()
+        self.workers = _conversion_workers()
+        self.pool = LibreOfficePool(self.workers)
+        self.converter = OfficeConverter(self.pool)
+        self.converted_files = []
+        self.failed_files = []
+        self.failed_paths = set()  # every source that failed, so main() doesn't retry it
+        self.stats = {'success': 0, 'repaired': 0, 'failed': 0}
+        self.total = 0
+        self._cancel = threading.Event()  # set by close(cancel=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, path: Path):
+        """Queue a downloaded file; anything that isn't an Office file is ignored"""
+        if path.suffix.lower() in OFFICE_EXTENSIONS:
+            self.queue.put(path)
+
+    def _run(self):
+        workers = self.workers
+        # One executor for the pipeline's lifetime: a fresh one per batch would mean
+        # fresh threads, and so fresh one-shot LibreOffice profiles, every batch
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            self._process(workers, executor)
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=self._cancel.is_set())
+
+    def _process(self, workers: int, executor: Optional[ThreadPoolExecutor]):
+        done = False
+        while not done:
+            # Block for the first item, then take whatever else is already waiting
+            batch = [self.queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            files = [f for f in batch if f is not self._DONE]
+            done = len(files) < len(batch)
+            if self._cancel.is_set():
+                continue
+
+            # Never let the worker die: close() would wait on it forever
+            try:
+                for result in _convert_batch(self.converter, files, workers, executor):
+                    if self._cancel.is_set():
+                        break
+                    self.total += 1
+                    _report_conversion(f"convert {self.total}", result,
+                                       self.stats, self.converted_files, self.failed_files)
+                    office_file, _, success, _, error = result
+                    if error or not success:
+                        self.failed_paths.add(office_file)
+            except Exception as e:
+                print(f"    {_FAIL_MARK} Conversion batch failed: {str(e)[:60]}")
+
+    def close(self, cancel: bool = False) -> List[Path]:
+        """
+        Wait for queued conversions to finish, print the summary and stop the pool.
+        With cancel=True (error / Ctrl+C path) queued files are discarded and only
+        conversions already running are waited for.
+        """
+        if cancel:
+            self._cancel.set()
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+        self.queue.put(self._DONE)
+        self._thread.join()
+        self.pool.stop()
+        if self.total:
+            _print_conversion_summary(self.total, self.stats, self.failed_files)
+        return self.converted_files
+
+
+def natural_sort_key(name: str) -> list:
     """
     Generate a sort key for natural (numeric) sorting of filenames.
     Handles filenames like: 1.Name.pdf, 2.Name.pdf, 10.Name.pdf, 11.Name.pdf
     """
-    import re
-    parts = re.split(r'(\d+)', path.name)
     # Convert numeric parts to integers for proper comparison
-    return [int(part) if part.isdigit() else part.lower() for part in parts]
+    return [int(part) if part.isdigit() else part.lower() for part in _RE_DIGITS.split(name)]
+
 
+def write_pdf(writer: PdfWriter, output_file: Path, size_hint: int = 0):
+    """
+    Write a PdfWriter to disk with few syscalls: serialise to memory and issue a
+    single write when the expected size is small, else stream through a 1 MiB buffer.
+    """
+    if size_hint < PDF_IN_MEMORY_LIMIT:
+        buf = io.BytesIO()
+        writer.write(buf)
+        with open(output_file, "wb") as f:
+            f.write(buf.getbuffer())
+    else:
+        with open(output_file, "wb", buffering=PDF_WRITE_BUFFER) as f:
+            writer.write(f)
+
+
+def _run_merge_cli(cmd: List[str], output_file: Path, ok_codes=(0,)) -> bool:
+    """Run an external PDF merge command; remove any partial output on failure"""
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=600)
+        if result.returncode in ok_codes and output_file.exists() and output_file.stat().st_size > 0:
+            return True
+    except Exception:
+        pass
+    try:
+        output_file.unlink()
+    except FileNotFoundError:
+        pass
+    return False
+
+
+def merge_with_pdftk(pdftk: str, pdf_files: List[Path], output_file: Path) -> bool:
+    """Concatenate PDFs with the pdftk CLI; False if pdftk rejected any input"""
+    return _run_merge_cli(
+        [pdftk, *[str(p) for p in pdf_files], "cat", "output", str(output_file)],
+        output_file,
+    )
+
+
+def merge_with_qpdf(qpdf: str, pdf_files: List[Path], output_file: Path) -> bool:
+    """Concatenate PDFs with the qpdf CLI (exit code 3 means success with warnings)"""
+    return _run_merge_cli(
+        [qpdf, "--empty", "--pages", *[str(p) for p in pdf_files], "--", str(output_file)],
+        output_file, ok_codes=(0, 3),
+    )
 
-def merge_pdfs_by_type(base_dir: Path, resource_types: List[str]):
+
+def merge_pdfs_by_type(tree: FileTree, resource_types: List[str]):
     """Merge PDFs by resource type for each unit"""
     print(f"\n{Fore.CYAN}[6/7] Merging PDFs...{Style.RESET_ALL}")
 
-    # Find all unit directories
-    unit_dirs = sorted([d for d in base_dir.iterdir() if d.is_dir() and d.name.startswith("Unit_")])
+    # For large units pdftk / qpdf stream pages to disk instead of holding the whole merged
+    # document in Python memory (pypdf keeps every page until the final write). Their
+    # 'cat' / '--pages' drop the sources' bookmarks, so normal units stay on pypdf.
+    pdftk = shutil.which("pdftk")
+    qpdf = shutil.which("qpdf")
 
-    for unit_dir in unit_dirs:
+    # Unit folders and their PDFs come from scan_download_tree, already in natural order
+    for unit_name, unit_files in tree.units.items():
+        unit_dir = tree.base_dir / unit_name
         print(f"\n{Fore.BLUE}Processing {unit_dir.name}{Style.RESET_ALL}")
 
         # Merge by resource type
         for res_id in resource_types:
             resource_name = RESOURCE_TYPES[res_id]
-            resource_dir = unit_dir / resource_name
             
-            if resource_dir.exists():
-                # Use natural sorting to preserve numeric order (1, 2, ..., 10, 11, not 1, 10, 11, 2)
-                pdf_files = sorted(resource_dir.glob("*.pdf"), key=natural_sort_key)
+            if resource_name in unit_files:
+                # Natural order preserves numbering (1, 2, ..., 10, 11, not 1, 10, 11, 2)
+                pdf_files, total_size = unit_files[resource_name]
                 
                 if pdf_files:
                     print(f"  {resource_name}: {len(pdf_files)} PDFs")
@@ -1223,18 +1926,36 @@ def merge_pdfs_by_type(base_dir: Path, resource_types: List[str]):
                     # Create merged PDF
                     output_file = unit_dir / f"{unit_dir.name}_{resource_name}_Merged.pdf"
 
+                    tool = None
+                    if total_size >= PDF_IN_MEMORY_LIMIT:
+                        if pdftk and merge_with_pdftk(pdftk, pdf_files, output_file):
+                            tool = "pdftk"
+                        elif qpdf and merge_with_qpdf(qpdf, pdf_files, output_file):
+                            tool = "qpdf"
+
+                    if tool:
+                        sys.stdout.write("".join(f"    + {pdf_file.name}\n" for pdf_file in pdf_files))
+                        size = output_file.stat().st_size
+                        print(f"    {Fore.GREEN}✓ Created {output_file.name} ({size:,} bytes, via {tool}){Style.RESET_ALL}")
+                        continue
+
                     try:
                         merger = PdfWriter()
+                        # Per-file lines are collected and written once per resource type
+                        log_lines = []
                         for pdf_file in pdf_files:
                             try:
-                                merger.append(str(pdf_file))
-                                print(f"    + {pdf_file.name}")
+                                # Parse each source once; append (unlike add_page) keeps its outline
+                                reader = PdfReader(str(pdf_file), strict=False)
+                                merger.append(reader)
+                                del reader
+                                log_lines.append(f"    + {pdf_file.name}\n")
                             except Exception as e:
-                                print(f"    ✗ Failed to add {pdf_file.name}: {e}")
+                                log_lines.append(f"    ✗ Failed to add {pdf_file.name}: {e}\n")
+                        sys.stdout.write("".join(log_lines))
 
                         if len(merger.pages) > 0:
-                            with open(output_file, "wb") as f:
-                                merger.write(f)
+                            write_pdf(merger, output_file, total_size)
                             merger.close()
 
                             size = output_file.stat().st_size
@@ -1248,55 +1969,34 @@ def merge_pdfs_by_type(base_dir: Path, resource_types: List[str]):
     print(f"\n{Fore.GREEN}✓ PDF merging complete{Style.RESET_ALL}")
 
 
-def cleanup_unwanted_files(base_dir: Path):
+def cleanup_unwanted_files(tree: FileTree):
     """Remove README files and other unwanted files"""
     print(f"\n{Fore.CYAN}[7/7] Cleaning up unwanted files...{Style.RESET_ALL}")
 
     removed_count = 0
-    
-    # Extended list of unwanted file patterns
-    unwanted_patterns = [
-        "README*",
-        "*.md",
-        "*.txt",
-        "Thumbs.db",
-        ".DS_Store",
-        "desktop.ini",
-        "*.tmp",
-        "*.temp",
-        "*~",  # Backup files
-    ]
-    
-    # Also remove empty directories
-    for pattern in unwanted_patterns:
-        for file in base_dir.rglob(pattern):
-            if file.is_file():
-                try:
-                    file.unlink()
-                    print(f"  {Fore.YELLOW}✓{Style.RESET_ALL} Removed: {file.name}")
-                    removed_count += 1
-                except Exception as e:
-                    print(f"  {Fore.RED}✗{Style.RESET_ALL} Failed to remove {file.name}: {e}")
-
-    # Remove empty directories
-    empty_dirs = []
-    for dirpath in base_dir.rglob("*"):
-        if dirpath.is_dir():
-            try:
-                # Check if directory is empty
-                if not any(dirpath.iterdir()):
-                    empty_dirs.append(dirpath)
-            except:
-                pass
-    
-    # Remove empty directories (deepest first)
-    for empty_dir in sorted(empty_dirs, key=lambda p: len(p.parts), reverse=True):
+    log_lines = []  # written in one go at the end
+
+    # Files matching UNWANTED_PATTERNS were found by scan_download_tree
+    for file in tree.unwanted:
         try:
-            empty_dir.rmdir()
-            print(f"  {Fore.YELLOW}✓{Style.RESET_ALL} Removed empty directory: {empty_dir.name}")
+            os.unlink(file)
+            log_lines.append(f"  {_DEL_MARK} Removed: {file.name}\n")
             removed_count += 1
-        except Exception as e:
-            pass  # Directory might not be empty anymore
+        except FileNotFoundError:
+            pass  # already gone
+        except OSError as e:
+            log_lines.append(f"  {_FAIL_MARK} Failed to remove {file.name}: {e}\n")
+
+    # Deepest folders first, so folders emptied by the cleanup go in the same pass
+    for folder in tree.dirs:
+        try:
+            os.rmdir(folder)  # fails cheaply (ENOTEMPTY) if anything is left
+            log_lines.append(f"  {_DEL_MARK} Removed empty directory: {folder.name}\n")
+            removed_count += 1
+        except OSError:
+            pass
+
+    sys.stdout.write("".join(log_lines))
 
     if removed_count > 0:
         print(f"{Fore.GREEN}✓ Removed {removed_count} unwanted items{Style.RESET_ALL}")
@@ -1337,17 +2037,31 @@ def display_courses(courses: List[Dict], page_size: int = 10, fetch_fn=None) ->
         scroll_top   = 0    # first visible row in the filtered list
         LIST_SIZE    = 10   # max rows shown at once
 
-        def matches(course: Dict, q: str) -> bool:
-            q = q.lower()
-            return (q in course.get("subjectCode", "").lower() or
-                    q in course.get("subjectName", "").lower())
+        def build_index():
+            # lower-cased (code, name, course) computed once per course list
+            return [(c.get("subjectCode", "").lower(), c.get("subjectName", "").lower(), c)
+                    for c in courses]
+
+        index        = build_index()
+        matched      = index    # index entries matching last_query
+        last_query   = ""
+        filtered     = courses[:]
 
         while True:
             stdscr.erase()
             max_h, max_w = stdscr.getmaxyx()
 
-            # ── filtered list ─────────────────────────────────────────────
-            filtered = [c for c in courses if matches(c, query)] if query else courses[:]
+            # ── filtered list (recomputed only when the query changes) ────
+            if query != last_query:
+                if not query:
+                    matched = index
+                else:
+                    # typing more only narrows the result, so filter the last matches
+                    base = matched if last_query and query.startswith(last_query) else index
+                    q = query.lower()
+                    matched = [e for e in base if q in e[0] or q in e[1]]
+                last_query = query
+                filtered = [e[2] for e in matched]
 
             # clamp selection
             if selected_idx >= len(filtered):
@@ -1506,6 +2220,9 @@ def display_courses(courses: List[Dict], page_size: int = 10, fetch_fn=None) ->
                         fresh_courses = fetch_fn()
                         courses.clear()
                         courses.extend(fresh_courses)
+                        index = matched = build_index()
+                        last_query = ""
+                        filtered = courses[:]
                         selected_idx = 0
                         scroll_top = 0
                         query = ""  # Reset search after refresh
@@ -1557,10 +2274,24 @@ def display_courses(courses: List[Dict], page_size: int = 10, fetch_fn=None) ->
             name = course.get('subjectName', 'N/A')
             print(f"{i:3d}. {code:<20} {name}")
         
+        # Subject codes aren't unique across offerings: keep every list number per code
+        code_index = {}
+        for i, course in enumerate(courses, 1):
+            code_index.setdefault(course.get('subjectCode', '').upper(), []).append(i)
+
         try:
-            choice = input(f"\n{Fore.CYAN}Enter course number (or 'q' to quit): {Style.RESET_ALL}").strip()
-            if choice.lower() == 'q':
-                return None
+            while True:
+                choice = input(f"\n{Fore.CYAN}Enter course number or code (or 'q' to quit): {Style.RESET_ALL}").strip()
+                if choice.lower() == 'q':
+                    return None
+                numbers = code_index.get(choice.upper())
+                if not numbers:
+                    break
+                if len(numbers) == 1:
+                    return courses[numbers[0] - 1]
+                # Ambiguous code: show the candidates rather than guess
+                print(f"{Fore.YELLOW}{choice} matches courses {', '.join(map(str, numbers))}; "
+                      f"enter the course number instead{Style.RESET_ALL}")
             idx = int(choice) - 1
             if 0 <= idx < len(courses):
                 return courses[idx]
@@ -1670,50 +2401,81 @@ def main():
 
         # Create base directory with subject name
         # Sanitize course name for folder name
-        safe_course_name = "".join(
-            c if c.isalnum() or c in (" ", "-", "_") else "_"
-            for c in course_name
-        ).strip()[:60]
-        safe_course_name = "_".join(safe_course_name.split())
+        safe_course_name = safe_name(course_name)
         
         base_dir = Path("downloads") / f"{safe_course_name}"
         base_dir.mkdir(parents=True, exist_ok=True)
 
+        # Conversion can run alongside the downloads, but only without COM
+        # automation (PowerPoint/Word COM must be driven from the main thread)
+        pipeline = None
+        convert_choice = None  # an answer here is final; no second prompt after downloading
+        if not COMTYPES_AVAILABLE:
+            print(
+                f"\n{Fore.CYAN}Convert Word/PowerPoint files to PDF as they download? (y/n): {Style.RESET_ALL}",
+                end="",
+            )
+            convert_choice = input().strip().lower()
+            if convert_choice == "y":
+                # No step number: download_resources prints [4/7] after this
+                print(f"\n{Fore.CYAN}Converting files to PDF alongside downloads...{Style.RESET_ALL}")
+                pipeline = ConversionPipeline()
+
         # Download resources
-        downloader.download_resources(
-            course_id, course_name, selected_units, selected_resources, base_dir
-        )
+        try:
+            downloader.download_resources(
+                course_id, course_name, selected_units, selected_resources, base_dir,
+                on_saved=pipeline.submit if pipeline else None,
+            )
+        except BaseException:
+            # Don't make the user wait for the whole queue on an error or Ctrl+C
+            if pipeline:
+                pipeline.close(cancel=True)
+            raise
+        if pipeline:
+            pipeline.close()
 
         # Check for non-PDF files and ask for conversion
-        office_files = []
-        for ext in ["*.docx", "*.pptx", "*.doc", "*.ppt"]:
-            office_files.extend(base_dir.rglob(ext))
+        tree = scan_download_tree(base_dir)
+        if pipeline and pipeline.failed_paths:
+            # Already tried (and reported) by the pipeline; don't pay for them twice
+            tree.office_files = [f for f in tree.office_files if f not in pipeline.failed_paths]
+        office_files = tree.office_files
 
         if office_files:
             print(
                 f"\n{Fore.YELLOW}Found {len(office_files)} non-PDF files (Word/PowerPoint){Style.RESET_ALL}"
             )
-            print(
-                f"{Fore.CYAN}Do you want to convert them to PDF? (y/n): {Style.RESET_ALL}",
-                end="",
-            )
-            convert_choice = input().strip().lower()
+            if convert_choice is None:
+                print(
+                    f"{Fore.CYAN}Do you want to convert them to PDF? (y/n): {Style.RESET_ALL}",
+                    end="",
+                )
+                convert_choice = input().strip().lower()
 
             if convert_choice == "y":
-                convert_office_to_pdf(base_dir)
+                if pipeline:
+                    # These weren't handed to the pipeline (or it was cut short)
+                    convert_office_to_pdf(tree, "Converting remaining files to PDF...")
+                else:
+                    convert_office_to_pdf(tree)
 
         # Detect and remove duplicate PDFs
         deduplicate_pdfs_in_folder(base_dir, selected_resources)
 
+        # Conversion and dedup add, remove and renumber files; scan once more for
+        # the merge and cleanup steps (merging only adds *_Merged.pdf at unit level)
+        tree = scan_download_tree(base_dir)
+
         # Ask for PDF merging
         print(f"\n{Fore.CYAN}Do you want to merge PDFs by resource type? (y/n): {Style.RESET_ALL}", end="")
         merge_choice = input().strip().lower()
 
         if merge_choice == "y":
-            merge_pdfs_by_type(base_dir, selected_resources)
+            merge_pdfs_by_type(tree, selected_resources)
 
         # Automatically cleanup unwanted files
-        cleanup_unwanted_files(base_dir)
+        cleanup_unwanted_files(tree)
 
         # Final summary
         print(f"\n{Fore.GREEN}{Style.BRIGHT}{'='*80}{Style.RESET_ALL}")